@@ -20,9 +20,6 @@ import os
 from typing import Optional
 from typing_extensions import Self
 from dataclasses import dataclass
-import sgx_dcap_quote_verify
-from sgx_dcap_quote_verify import VerificationStatus
-import toml
 from pathlib import Path
 
 
@@ -132,6 +129,11 @@ def validate_attestation(
         -
     """
 
+    # The quote verification library is only needed here, it is imported
+    # lazily so that importing blindai (e.g. in simulation mode) does not load it.
+    import sgx_dcap_quote_verify
+    from sgx_dcap_quote_verify import VerificationStatus
+
     # TODO: Handle the case where the retuned quote status is STATUS_TCB_SW_HARDENING_NEEDED
     # We must do more cautious checks in this case in order to determine whether or not to accept the quote
 
@@ -175,12 +177,10 @@ def validate_attestation(
         )
 
     assert attestation_result.enclave_report is not None
-    if (
-        hashlib.sha256(enclave_held_data).digest()
-        != attestation_result.enclave_report.report_data[:32]
-    ):
+    enclave_held_data_hash = hashlib.sha256(enclave_held_data).digest()
+    if enclave_held_data_hash != attestation_result.enclave_report.report_data[:32]:
         raise EnclaveHeldDataError(
-            expected=hashlib.sha256(enclave_held_data).digest(),
+            expected=enclave_held_data_hash,
             got=attestation_result.enclave_report.report_data[:32],
         )
 
@@ -297,6 +297,8 @@ class EnclaveManifest:
         Returns:
             manifest: The manifest.
         """
+        import toml
+
         return EnclaveManifest.from_dict(toml.loads(s))
 
     @staticmethod
@@ -308,6 +310,8 @@ class EnclaveManifest:
         Returns:
             manifest: The manifest.
         """
+        import toml
+
         return EnclaveManifest.from_dict(toml.load(path))
 
     @staticmethod
@@ -14,34 +14,82 @@
 
 
 import pathlib
-from ._dcap_attestation import validate_attestation, AttestationError, Collateral
+from ._dcap_attestation import AttestationError
 from .utils import *
 
 from dataclasses import dataclass
 from enum import IntEnum
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 import os
+import asyncio
 import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import collections
+import queue
 import socket
+import threading
+import struct
 
 import numpy as np
 import cbor2 as cbor
 
 from hashlib import sha256
+from datetime import datetime
+import cryptography.x509
+from cryptography.hazmat.primitives import serialization
 import platform
 import getpass
 import logging
 import tempfile
+import time
 import requests
 from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
 from importlib_metadata import version
 import warnings
 
 app_version = version("blindai")
 
+logger = logging.getLogger(__name__)
+
 CONNECTION_TIMEOUT = 10
 
+# Maximum number of connections kept open to the attested server, i.e. the
+# number of requests that can be in flight at once without opening (and then
+# dropping) extra connections.
+DEFAULT_POOL_SIZE = 4
+
+# Guards the module-level caches below, which are shared by the connections
+# made (and the requests sent) from different threads.
+_CACHE_LOCK = threading.Lock()
+
+# Successful attestations are remembered for this many seconds, so that
+# reconnecting to the same enclave skips the DCAP quote verification.
+ATTESTATION_CACHE_TTL = 300
+
+# Maps a digest of the attestation evidence (quote, collateral, enclave
+# certificate and manifest) to the expiry time of the cached result.
+_ATTESTATION_CACHE: Dict[bytes, float] = {}
+
+# SHA-256 of the model files uploaded by this process, keyed by their path and
+# stat signature, so that uploading the same file again skips hashing it.
+_MODEL_HASH_CACHE: Dict[Tuple[str, int, int, int, int], bytes] = {}
+_MODEL_HASH_CACHE_SIZE = 64
+
+# Sessions to the unattested servers, keyed by URL. See _unattested_session.
+_UNATTESTED_SESSIONS: Dict[str, requests.Session] = {}
+
+# Default size of the slices of the model file handed to the HTTP layer
+# during upload. Large chunks mean fewer writes (and syscalls) per upload.
+CHUNK_SIZE = 1 << 20
+
+# CBOR major types (RFC 8949, section 3.1) used when streaming request bodies.
+_CBOR_BYTES = 2
+_CBOR_MAP = 5
+
 
 class SimulationModeWarning(Warning):
     pass
@@ -77,13 +125,125 @@ format_per_item = {
 
 
 def serialize_tensor(tensor: np.ndarray, type: ModelDatumType) -> bytes:
-    return np.array(tensor).astype(format_per_item[type], casting="equiv").tobytes()
+    # tobytes() always produces the C-order (i.e. flattened) layout, and astype
+    # only copies when the dtype differs, so arrays already in the right
+    # format are copied exactly once.
+    return (
+        np.asarray(tensor)
+        .astype(format_per_item[type], casting="equiv", copy=False)
+        .tobytes()
+    )
 
 
 def deserialize_tensor(data: bytes, type: ModelDatumType) -> np.ndarray:
     return np.frombuffer(data, dtype=format_per_item[type])
 
 
+def _cbor_head(major_type: int, length: int) -> bytes:
+    """Encode the head of a CBOR data item with the given major type and
+    length argument."""
+    if length < 24:
+        return struct.pack(">B", major_type << 5 | length)
+    if length < 1 << 8:
+        return struct.pack(">BB", major_type << 5 | 24, length)
+    if length < 1 << 16:
+        return struct.pack(">BH", major_type << 5 | 25, length)
+    if length < 1 << 32:
+        return struct.pack(">BI", major_type << 5 | 26, length)
+    return struct.pack(">BQ", major_type << 5 | 27, length)
+
+
+def _prefetch(chunks: Iterator[bytes], depth: int = 2) -> Iterator[bytes]:
+    """Iterate over chunks while the next ones are produced by a background
+    thread.
+
+    This is used to overlap reading a file from the disk with sending it.
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = collections.deque(
+            executor.submit(next, chunks, None) for _ in range(depth)
+        )
+        while True:
+            chunk = pending.popleft().result()
+            if chunk is None:
+                return
+            pending.append(executor.submit(next, chunks, None))
+            yield chunk
+
+
+def _read_chunks(f, length: int, chunk_size: int, buffers: int) -> Iterator[memoryview]:
+    """Read exactly `length` bytes from a binary file object, chunk by chunk.
+
+    The chunks are read in place into `buffers` rotating buffers, so that no
+    memory is allocated per chunk. A chunk is overwritten once `buffers` more
+    chunks have been read, so no more than `buffers - 1` chunks may be read
+    ahead of the one being consumed.
+
+    Raises:
+        ValueError: The file does not hold `length` bytes anymore.
+    """
+    views = [memoryview(bytearray(chunk_size)) for _ in range(buffers)]
+    remaining = length
+    i = 0
+    while remaining > 0:
+        view = views[i % buffers][: min(chunk_size, remaining)]
+        n = f.readinto(view)
+        if not n:
+            break
+        remaining -= n
+        i += 1
+        yield view[:n]
+    if remaining != 0 or f.read(1):
+        raise ValueError("The model file was modified while it was being uploaded")
+
+
+class _PreEncoded:
+    """A value already encoded to CBOR, to be written as is by `_cbor_default`."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def _cbor_default(encoder, value):
+    """cbor2 hook splicing `_PreEncoded` values into the output."""
+    if not isinstance(value, _PreEncoded):
+        raise cbor.CBOREncodeError(f"cannot serialize type {type(value).__name__}")
+    encoder.write(value.data)
+
+
+def _cbor_map_prefix(fields: Dict[str, Any], last_key: str) -> bytes:
+    """Encode a CBOR map made of fields and of a last entry whose value is
+    left out, to be appended (or streamed) by the caller."""
+    encoded_fields = [
+        cbor.dumps(k) + cbor.dumps(v, default=_cbor_default) for k, v in fields.items()
+    ]
+    return (
+        _cbor_head(_CBOR_MAP, len(fields) + 1)
+        + b"".join(encoded_fields)
+        + cbor.dumps(last_key)
+    )
+
+
+class _SizedStream:
+    """An iterable of bytes chunks with a known total length.
+
+    requests sends it with a Content-Length header and writes the chunks
+    as they are produced, instead of buffering the whole body.
+    """
+
+    def __init__(self, chunks, length: int):
+        self._chunks = chunks
+        self._length = length
+
+    def __iter__(self):
+        return iter(self._chunks)
+
+    def __len__(self) -> int:
+        return self._length
+
+
 class TensorInfo:
     fact: List[int]
     datum_type: ModelDatumType
@@ -104,10 +264,12 @@ class Tensor:
 
     info: Union[TensorInfo, dict]
     bytes_data: bytes
+    _array: Optional[np.ndarray]
 
     def __init__(self, info: Union[TensorInfo, dict], bytes_data: bytes):
         self.info = info
         self.bytes_data = bytes_data
+        self._array = None
 
     def as_flat(self) -> list:
         """Convert the prediction calculated by the server to a flat python
@@ -115,11 +277,17 @@ class Tensor:
         return self.as_numpy().tolist()
 
     def as_numpy(self):
-        """Convert the prediction calculated by the server to a numpy array."""
+        """Convert the prediction calculated by the server to a numpy array.
 
-        arr = deserialize_tensor(self.bytes_data, self.info.datum_type)
-        arr.shape = self.shape
-        return arr
+        The array is a read-only view over the received bytes. It is built
+        on the first call, the following conversions return new views of it,
+        so reshaping the returned array does not affect them.
+        """
+        if self._array is None:
+            arr = deserialize_tensor(self.bytes_data, self.datum_type)
+            arr.shape = self.shape
+            self._array = arr
+        return self._array.view()
 
     def as_torch(self):
         """Convert the prediction calculated by the server to a Torch Tensor.
@@ -153,7 +321,7 @@ class Tensor:
 
 @dataclass
 class UploadModel:
-    model: List[int]
+    model: Optional[bytes]
     length: int
     model_name: str
     optimize: bool
@@ -178,7 +346,7 @@ class UploadModel:
 class RunModel:
     model_id: str
     model_hash: str
-    inputs: List[Tensor]
+    inputs: Optional[List[Tensor]]
     client_info: Optional["_ClientInfo"]
 
     def __init__(self, model_id, model_hash, inputs, client_info=None):
@@ -196,23 +364,6 @@ class DeleteModel:
         self.model_id = model_id
 
 
-@dataclass
-class SendModelReply:
-    hash: bytes
-    model_id: str
-
-    def __init__(self, **entries):
-        self.__dict__.update(entries)
-
-
-@dataclass
-class RunModelReply:
-    outputs: List[Any]
-
-    def __init__(self, **entries):
-        self.__dict__.update(entries)
-
-
 @dataclass
 class UploadResponse:
     model_id: str
@@ -416,11 +567,11 @@ def translate_tensor(
     """
     if _is_torch_tensor(tensor):
         info = TensorInfo(tensor.shape, translate_dtype(tensor.dtype), name)
-        iterable = tensor.flatten().numpy()
+        iterable = tensor.numpy()
 
     elif _is_numpy_array(tensor):
         info = TensorInfo(tensor.shape, translate_dtype(tensor.dtype), name)
-        iterable = tensor.flatten()
+        iterable = tensor
 
     else:
         # Input is flatten tensor.
@@ -502,6 +653,135 @@ def translate_tensors(tensors, dtypes, shapes) -> List[dict]:
     return serialized_tensors
 
 
+def _hash_file(f) -> bytes:
+    """Compute the SHA-256 of the whole content of a binary file object."""
+    f.seek(0)
+    h = sha256()
+    for chunk in iter(partial(f.read, CHUNK_SIZE), b""):
+        h.update(chunk)
+    return h.digest()
+
+
+def _cache_model_hash(key: Tuple[str, int, int, int, int], digest: bytes):
+    """Remember the hash of a model file, evicting the oldest entry when the
+    cache is full."""
+    with _CACHE_LOCK:
+        if (
+            key not in _MODEL_HASH_CACHE
+            and len(_MODEL_HASH_CACHE) >= _MODEL_HASH_CACHE_SIZE
+        ):
+            del _MODEL_HASH_CACHE[next(iter(_MODEL_HASH_CACHE))]
+        _MODEL_HASH_CACHE[key] = digest
+
+
+def _socket_options() -> List[Tuple[int, int, int]]:
+    """Socket options for the connections to the server.
+
+    On top of urllib3's defaults (which disable Nagle's algorithm), TCP
+    keepalive is enabled so that idle pooled connections are kept open
+    through NATs and load balancers, and dead peers are detected quickly.
+    """
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    # These are not available on every platform (e.g. macOS, Windows).
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 20))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 5))
+    if hasattr(socket, "TCP_KEEPCNT"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3))
+    return options
+
+
+class _TunedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter opening its connections with `_socket_options`.
+
+    Failures to connect are retried with a short backoff. Nothing has reached
+    the server at that point, so this is safe for every request. Errors
+    happening once the request is sent are never retried.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault(
+            "max_retries",
+            Retry(
+                total=3,
+                connect=3,
+                read=False,
+                redirect=False,
+                other=0,
+                backoff_factor=0.1,
+                allowed_methods=None,
+            ),
+        )
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = _socket_options()
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _unattested_session(url: str) -> requests.Session:
+    """Return the session used to talk to the unattested server at url.
+
+    Sessions are kept for the lifetime of the process, so that connecting
+    again to the same server reuses the open connection instead of going
+    through a new TLS handshake.
+    """
+    s = _UNATTESTED_SESSIONS.get(url)
+    if s is None:
+        s = requests.Session()
+        # Always raise an exception when HTTP returns an error code for the unattested connection
+        # Note : we might want to do the same for the attested connection ?
+        s.hooks = {"response": lambda r, *args, **kwargs: r.raise_for_status()}
+        s.mount("http://", _TunedHTTPAdapter())
+        s.mount("https://", _TunedHTTPAdapter())
+        s = _UNATTESTED_SESSIONS.setdefault(url, s)
+    return s
+
+
+def _attestation_cache_key(
+    quote: bytes,
+    collateral: bytes,
+    cert: bytes,
+    manifest_path: Optional[pathlib.Path],
+    use_cloud_manifest: bool,
+) -> bytes:
+    """Digest everything the outcome of validate_attestation depends on."""
+    h = sha256()
+    for part in (quote, collateral, cert):
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    h.update(repr((manifest_path, use_cloud_manifest)).encode("utf-8"))
+    if isinstance(manifest_path, pathlib.Path):
+        h.update(manifest_path.read_bytes())
+    return h.digest()
+
+
+def _cache_attestation(key: bytes):
+    """Remember a successful attestation for ATTESTATION_CACHE_TTL seconds.
+
+    The expired entries are dropped at the same time, so that the cache does
+    not grow with every enclave connected to over the life of the process.
+    """
+    with _CACHE_LOCK:
+        now = time.monotonic()
+        for expired in [k for k, expiry in _ATTESTATION_CACHE.items() if expiry <= now]:
+            del _ATTESTATION_CACHE[expired]
+        _ATTESTATION_CACHE[key] = now + ATTESTATION_CACHE_TTL
+
+
+def _check_cert_validity(x509_cert: cryptography.x509.Certificate):
+    """Make sure the enclave certificate is within its validity period.
+
+    Raises:
+        AttestationError: if the certificate is expired or not yet valid
+    """
+    now = datetime.utcnow()
+    if not x509_cert.not_valid_before <= now <= x509_cert.not_valid_after:
+        raise AttestationError("The enclave certificate is expired or not yet valid")
+
+
 class BlindAiConnection(contextlib.AbstractContextManager):
     """A class to represent a connection to a BlindAi server."""
 
@@ -517,6 +797,9 @@ class BlindAiConnection(contextlib.AbstractContextManager):
         hazmat_http_on_unattested_port: bool,
         simulation_mode: bool,
         use_cloud_manifest: bool,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        chunk_size: int = CHUNK_SIZE,
+        batch_deletes: bool = False,
     ):
         """Connect to a BlindAi service.
 
@@ -530,9 +813,19 @@ class BlindAiConnection(contextlib.AbstractContextManager):
             hazmat_manifest_path (Optional[pathlib.Path]):
             hazmat_http_on_unattested_port (bool):
             simulation_mode (bool):
+            use_cloud_manifest (bool):
+            pool_size (int):
+            chunk_size (int):
+            batch_deletes (bool):
         Returns:
         """
 
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self._chunk_size = chunk_size
+
         if simulation_mode:
             warnings.warn(
                 (
@@ -558,6 +851,9 @@ class BlindAiConnection(contextlib.AbstractContextManager):
             user_agent_version=app_version,
             is_colab=False,
         )
+        # The client info is sent along every upload and inference request,
+        # encode it once for the whole connection.
+        self._client_info_cbor = _PreEncoded(cbor.dumps(self.client_info.__dict__))
 
         if hazmat_http_on_unattested_port:
             self._unattested_url = f"http://{addr}:{unattested_server_port}"
@@ -573,42 +869,74 @@ class BlindAiConnection(contextlib.AbstractContextManager):
         # that the one included in the certificate i.e. blindai-srv
         # For instance we can use it to connect to the server via the
         # domain / IP provided to connect(). See below
-        class CustomHostNameCheckingAdapter(HTTPAdapter):
+        class CustomHostNameCheckingAdapter(_TunedHTTPAdapter):
             def cert_verify(self, conn, url, verify, cert):
                 conn.assert_hostname = "blindai-srv"
                 return super(CustomHostNameCheckingAdapter, self).cert_verify(
                     conn, url, verify, cert
                 )
 
-        s = requests.Session()
-        # Always raise an exception when HTTP returns an error code for the unattested connection
-        # Note : we might want to do the same for the attested connection ?
-        s.hooks = {"response": lambda r, *args, **kwargs: r.raise_for_status()}
+        s = _unattested_session(self._unattested_url)
         req = s.get(self._unattested_url)
         cert = cbor.loads(req.content)
         if not simulation_mode and "mock" in req.headers["Server"]:
             raise AttestationError(
                 "The BlindAI server is a mock. You can only connect to it in simulation mode."
             )
+        # The certificate is parsed once, for both the validity check and the
+        # PEM conversion below.
+        try:
+            x509_cert = cryptography.x509.load_der_x509_certificate(cert)
+        except Exception as e:
+            raise AttestationError("Attestation verification failed")
 
         if not simulation_mode:
             try:
-                quote = cbor.loads(s.get(f"{self._unattested_url}/quote").content)
-                collateral = cbor.loads(
-                    s.get(f"{self._unattested_url}/collateral").content
-                )
-                try:
-                    collateral = Collateral(**collateral)
-                except TypeError as e:
-                    raise AttestationError("Bad attestation collateral from the server")
-
-                validate_attestation(
-                    quote,
-                    collateral,
+                # The quote and the collateral are independent, fetch them
+                # concurrently rather than paying two round-trips in a row.
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    quote_future = executor.submit(
+                        s.get, f"{self._unattested_url}/quote"
+                    )
+                    collateral_future = executor.submit(
+                        s.get, f"{self._unattested_url}/collateral"
+                    )
+                    quote_content = quote_future.result().content
+                    collateral_content = collateral_future.result().content
+                cache_key = _attestation_cache_key(
+                    quote_content,
+                    collateral_content,
                     cert,
-                    manifest_path=hazmat_manifest_path,
-                    use_cloud_manifest=use_cloud_manifest,
+                    hazmat_manifest_path,
+                    use_cloud_manifest,
                 )
+                with _CACHE_LOCK:
+                    expiry = _ATTESTATION_CACHE.get(cache_key)
+                if expiry is None or expiry <= time.monotonic():
+                    # Only needed when attesting a real enclave, see
+                    # _dcap_attestation for why it is imported lazily.
+                    from ._dcap_attestation import validate_attestation, Collateral
+
+                    quote = cbor.loads(quote_content)
+                    collateral = cbor.loads(collateral_content)
+                    try:
+                        collateral = Collateral(**collateral)
+                    except TypeError as e:
+                        raise AttestationError(
+                            "Bad attestation collateral from the server"
+                        )
+
+                    validate_attestation(
+                        quote,
+                        collateral,
+                        cert,
+                        manifest_path=hazmat_manifest_path,
+                        use_cloud_manifest=use_cloud_manifest,
+                    )
+                    _cache_attestation(cache_key)
+                # The certificate validity is checked even when the attestation
+                # comes from the cache, as it may expire in the meantime.
+                _check_cert_validity(x509_cert)
             except AttestationError as e:
                 raise
             except Exception as e:
@@ -620,24 +948,63 @@ class BlindAiConnection(contextlib.AbstractContextManager):
         # has to be created.
 
         attested_server_cert_file = tempfile.NamedTemporaryFile(mode="wb")
-        attested_server_cert_file.write(cert_der_to_pem(cert))
+        attested_server_cert_file.write(
+            x509_cert.public_bytes(serialization.Encoding.PEM)
+        )
         attested_server_cert_file.flush()
         # the file should not be close until the end of BlindAiConnection
         # so we store it in the object (else it might get garbage collected)
         self.attested_cert_file = attested_server_cert_file
 
+        # The adapters pool the connections to the enclave, concurrent callers
+        # each get their own connection (up to pool_size are kept open).
         attested_conn = requests.Session()
         attested_conn.verify = attested_server_cert_file.name
-        attested_conn.mount(self._attested_url, CustomHostNameCheckingAdapter())
-        attested_conn.mount(self._model_management_url, CustomHostNameCheckingAdapter())
+        attested_conn.mount(
+            self._attested_url, CustomHostNameCheckingAdapter(pool_maxsize=pool_size)
+        )
+        attested_conn.mount(
+            self._model_management_url,
+            CustomHostNameCheckingAdapter(pool_maxsize=pool_size),
+        )
 
         # finally try to connect to the enclave
         try:
             attested_conn.get(self._attested_url)
         except Exception as e:
+            attested_conn.close()
             raise AttestationError("Cannot establish secure connection to the enclave")
 
         self._conn = attested_conn
+        # Used to keep several requests in flight for the batch methods.
+        self._executor = ThreadPoolExecutor(max_workers=pool_size)
+        # The coroutine methods get their own workers, so that awaiting them
+        # never queues behind a batch (or the other way around).
+        self._async_executor = ThreadPoolExecutor(max_workers=pool_size)
+
+        # With batch_deletes, delete_model only queues the model ids and a
+        # background thread sends whatever has accumulated. The lock makes
+        # sure no id is queued after the None sent by close, which the thread
+        # would never read.
+        self._delete_queue: Optional[queue.Queue] = None
+        self._delete_lock = threading.Lock()
+        self._closed = False
+        if batch_deletes:
+            self._delete_queue = queue.Queue()
+            self._delete_thread = threading.Thread(
+                target=self._delete_worker, daemon=True
+            )
+            self._delete_thread.start()
+
+    def _post(self, url: str, data) -> requests.Response:
+        """Send a request to the enclave.
+
+        Raises:
+            HttpError: raised by the requests lib to relay server side errors
+        """
+        r = self._conn.post(url, data=data)
+        r.raise_for_status()
+        return r
 
     def upload_model(
         self,
@@ -661,7 +1028,9 @@ class BlindAiConnection(contextlib.AbstractContextManager):
                 Optimzing should only be turned off when you are encountering issues loading your model.
         Raises:
             HttpError: raised by the requests lib to relay server side errors
-            ValueError: raised when inputs sanity checks fail
+            ValueError: raised when inputs sanity checks fail, or when the model hash
+                returned by the server does not match the uploaded model (the model is deleted from
+                the server before raising)
         Returns:
             UploadResponse: The response object.
         """
@@ -669,23 +1038,84 @@ class BlindAiConnection(contextlib.AbstractContextManager):
             model_name = os.path.basename(model)
 
         with open(model, "rb") as f:
-            model_bytes = f.read()
-
-        length = len(model_bytes)
-
-        data = UploadModel(
-            model=list(model_bytes),
-            length=length,
-            model_name=model_name,
-            optimize=optimize,
-            client_info=self.client_info.__dict__,
-        )
-        bytes_data = cbor.dumps(data.__dict__)
-        r = self._conn.post(f"{self._model_management_url}/upload", data=bytes_data)
-        r.raise_for_status()
-        send_model_reply = SendModelReply(**cbor.loads(r.content))
+            st = os.fstat(f.fileno())
+            length = st.st_size
+            if length == 0:
+                raise ValueError("The model file is empty")
+
+            data = UploadModel(
+                model=None,
+                length=length,
+                model_name=model_name,
+                optimize=optimize,
+                client_info=self._client_info_cbor,
+            )
+            # The request body is the CBOR encoding of UploadModel.
+            # Every field but the model is encoded upfront, the model
+            # itself is streamed as a byte string straight from the file.
+            fields = {k: v for k, v in data.__dict__.items() if k != "model"}
+            prefix = _cbor_map_prefix(fields, "model") + _cbor_head(_CBOR_BYTES, length)
+
+            # Unless this very file was already uploaded, the model is hashed as
+            # it streams to the server, so that the bytes are only read once.
+            cache_key = (
+                os.path.abspath(model),
+                st.st_dev,
+                st.st_ino,
+                st.st_mtime_ns,
+                st.st_size,
+            )
+            with _CACHE_LOCK:
+                expected_hash = _MODEL_HASH_CACHE.get(cache_key)
+            model_hash = sha256() if expected_hash is None else None
+
+            def body():
+                yield prefix
+                # The next chunks are read from the disk in the background
+                # while the current one is sent.
+                depth = 2
+                chunks = _prefetch(
+                    _read_chunks(f, length, self._chunk_size, depth + 1), depth
+                )
+                if model_hash is None:
+                    yield from chunks
+                    return
+                for chunk in chunks:
+                    model_hash.update(chunk)
+                    yield chunk
+
+            r = self._post(
+                f"{self._model_management_url}/upload",
+                _SizedStream(body(), len(prefix) + length),
+            )
+            # The reply is a SendModelReply, its fields are read straight from the
+            # decoded map.
+            send_model_reply = cbor.loads(r.content)
+            if model_hash is not None:
+                digest = model_hash.digest()
+            else:
+                assert expected_hash is not None
+                digest = expected_hash
+                if send_model_reply["hash"] != digest:
+                    # The file was modified without changing its stat signature
+                    # (e.g. rewritten with `cp -p`). Forget the stale hash and
+                    # hash the file itself.
+                    with _CACHE_LOCK:
+                        _MODEL_HASH_CACHE.pop(cache_key, None)
+                    digest = _hash_file(f)
+        if send_model_reply["hash"] != digest:
+            # The server has stored the model all the same, don't leave it behind.
+            model_id = send_model_reply["model_id"]
+            try:
+                self._delete_model(model_id)
+            except Exception:
+                logger.exception("Failed to delete model %s", model_id)
+            raise ValueError(
+                f"The hash of the model computed by the server does not match the uploaded model (model id: {model_id})"
+            )
+        _cache_model_hash(cache_key, digest)
         ret = UploadResponse(
-            model_id=send_model_reply.model_id, hash=send_model_reply.hash
+            model_id=send_model_reply["model_id"], hash=send_model_reply["hash"]
         )
         return ret
 
@@ -713,6 +1143,8 @@ class BlindAiConnection(contextlib.AbstractContextManager):
             model_hash (str): hash of the Onnx model uploaded. If no uuid was provided, the server will try to find a model matching this hash
                 input_tensors (Union[List[Any], List[List[Any]]))): The input data. It must be an array of numpy,
                 tensors or flat list of the same type datum_type specified in `upload_model`.
+                Numpy arrays and tensors are serialized with a single copy of their buffer, whereas flat lists
+                have to be converted element by element, so prefer numpy arrays or tensors for large inputs.
             dtypes (Union[List[ModelDatumType], ModelDatumType], optional): The type of data
                 of the data you want to upload. Only required if you are uploading flat lists, will be ignored
                 if you are uploading numpy or tensors (this info will be extracted directly from the tensors/numpys).
@@ -727,6 +1159,16 @@ class BlindAiConnection(contextlib.AbstractContextManager):
         """
         # Run Model Request and Response
 
+        prefix = self._run_model_prefix(model_id, model_hash)
+        return self._run_model(prefix, input_tensors, dtypes, shapes)
+
+    def _run_model_prefix(self, model_id: str, model_hash: str) -> bytes:
+        """Encode the fields of a RunModel request that do not depend on the
+        inputs.
+
+        Raises:
+            ValueError: raised when inputs sanity checks fail
+        """
         if not model_id and not model_hash:
             raise ValueError("You must provide at least one model_id or model_hash")
         if model_id and model_hash:
@@ -734,27 +1176,43 @@ class BlindAiConnection(contextlib.AbstractContextManager):
                 "You cannot provide a model_id and a model_hash in the same time"
             )
 
-        tensors = translate_tensors(input_tensors, dtypes, shapes)
         run_data = RunModel(
             model_hash=model_hash,
             model_id=model_id,
-            inputs=tensors,
-            client_info=self.client_info.__dict__,
+            inputs=None,
+            client_info=self._client_info_cbor,
         )
-        bytes_run_data = cbor.dumps(run_data.__dict__)
-        r = self._conn.post(f"{self._attested_url}/run", data=bytes_run_data)
-        r.raise_for_status()
-        run_model_reply = RunModelReply(**cbor.loads(r.content))
+        fields = {k: v for k, v in run_data.__dict__.items() if k != "inputs"}
+        return _cbor_map_prefix(fields, "inputs")
+
+    def _run_model(
+        self,
+        prefix: bytes,
+        input_tensors: Optional[Union[List, Dict]],
+        dtypes: Optional[List[ModelDatumType]],
+        shapes: Optional[Union[List[List[int]], List[int]]],
+    ) -> RunModelResponse:
+        """Run an inference, prefix being the output of `_run_model_prefix`."""
+        tensors = translate_tensors(input_tensors, dtypes, shapes)
+        bytes_inputs = cbor.dumps(tensors)
+        # The body is sent in two parts to avoid concatenating the inputs.
+        r = self._post(
+            f"{self._attested_url}/run",
+            _SizedStream((prefix, bytes_inputs), len(prefix) + len(bytes_inputs)),
+        )
+        # The reply is a RunModelReply, the output tensors are built straight
+        # from the decoded map.
+        outputs = cbor.loads(r.content)["outputs"]
 
         ret = RunModelResponse(
             output=[
                 Tensor(TensorInfo(**output["info"]), output["bytes_data"])
-                for output in run_model_reply.outputs
+                for output in outputs
             ]
         )
         return ret
 
-    def delete_model(self, model_id: str):
+    def delete_model(self, model_id: str, sync: bool = False):
         """Delete a model in the inference server.
 
         This may be used to free up some memory. If you did not specify that you
@@ -766,18 +1224,188 @@ class BlindAiConnection(contextlib.AbstractContextManager):
             It doesn't relies on a session token or anything, hence if the `model_id` is known,
             it's deletion is possible.
 
+        When the connection was created with `batch_deletes`, the deletion is
+        only queued and done in the background (unless `sync` is set), so errors
+        are logged instead of being raised.
+
         Args:
             model_id (str): The id of the model to remove.
+            sync (bool, optional): Wait for the deletion even if `batch_deletes` is enabled.
+                Defaults to False.
         Raises:
             HttpError: raised by the requests lib to relay server side errors
             ValueError: raised when inputs sanity checks fail
+            RuntimeError: raised when the deletion would be queued but the connection is closed
         """
+        if self._delete_queue is not None and not sync:
+            with self._delete_lock:
+                if self._closed:
+                    raise RuntimeError("The connection is closed")
+                self._delete_queue.put(model_id)
+            return
+        self._delete_model(model_id)
+
+    def _delete_model(self, model_id: str):
         delete_data = DeleteModel(model_id=model_id)
         bytes_delete_data = cbor.dumps(delete_data.__dict__)
-        r = self._conn.post(f"{self._model_management_url}/delete", bytes_delete_data)
-        r.raise_for_status()
+        self._post(f"{self._model_management_url}/delete", bytes_delete_data)
+
+    def run_model_batch(
+        self,
+        model_id: str = "",
+        model_hash: str = "",
+        inputs: Optional[List[Union[List, Dict]]] = None,
+        dtypes: Optional[List[ModelDatumType]] = None,
+        shapes: Optional[Union[List[List[int]], List[int]]] = None,
+    ) -> List[RunModelResponse]:
+        """Run a model on several inputs.
+
+        The inference requests are pipelined over the connection pool rather
+        than sent one after the other, which saves round-trips when running
+        many inputs. See `run_model` for the security & confidentiality
+        warnings.
+
+        Args:
+            model_id (str): If set, will run a specific model.
+            model_hash (str): hash of the Onnx model uploaded. If no uuid was provided, the server will try to find a model matching this hash
+            inputs (List[Union[List, Dict]]): The list of inputs. Each item is given as `input_tensors` to `run_model`.
+            dtypes (Union[List[ModelDatumType], ModelDatumType], optional): The type of data of each input,
+                shared by all the items. See `run_model`.
+            shapes (Union[List[List[int]], List[int]], optional): The shape of each input, shared by all the items.
+                See `run_model`.
+        Raises:
+            HttpError: raised by the requests lib to relay server side errors
+            ValueError: raised when inputs sanity checks fail
+        Returns:
+            List[RunModelResponse]: The response objects, in the same order as the inputs.
+        """
+        if inputs is None:
+            inputs = []
+
+        # Only the inputs change from one request to the other, the rest of
+        # the request is encoded once for the whole batch.
+        prefix = self._run_model_prefix(model_id, model_hash)
+        futures = [
+            self._executor.submit(
+                self._run_model, prefix, input_tensors, dtypes, shapes
+            )
+            for input_tensors in inputs
+        ]
+        return [future.result() for future in futures]
+
+    def delete_models(self, model_ids: List[str]):
+        """Delete several models in the inference server.
+
+        The deletion requests are pipelined over the connection pool rather
+        than sent one after the other. See `delete_model` for the security &
+        confidentiality warnings.
+
+        Args:
+            model_ids (List[str]): The ids of the models to remove.
+        Raises:
+            HttpError: raised by the requests lib to relay server side errors
+            ValueError: raised when inputs sanity checks fail
+        """
+        futures = [
+            self._executor.submit(self._delete_model, model_id)
+            for model_id in model_ids
+        ]
+        for future in futures:
+            future.result()
+
+    async def _run_async(self, func, *args):
+        """Run func(*args) on the workers of the coroutine methods.
+
+        Raises:
+            RuntimeError: raised when the connection is closed
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._async_executor, func, *args)
+        except RuntimeError:
+            # The executor refuses new work once close() shut it down.
+            raise RuntimeError("The connection is closed") from None
+        return await future
+
+    async def upload_model_async(
+        self,
+        model: str,
+        model_name: Optional[str] = None,
+        optimize: bool = True,
+    ) -> UploadResponse:
+        """Coroutine version of `upload_model`.
+
+        The request runs on worker threads dedicated to the coroutine methods,
+        so the event loop is not blocked and several requests can be in flight
+        at once. Raises RuntimeError once the connection is closed.
+        """
+        return await self._run_async(self.upload_model, model, model_name, optimize)
+
+    async def run_model_async(
+        self,
+        model_id: str = "",
+        model_hash: str = "",
+        input_tensors: Optional[Union[List, Dict]] = None,
+        dtypes: Optional[List[ModelDatumType]] = None,
+        shapes: Optional[Union[List[List[int]], List[int]]] = None,
+    ) -> RunModelResponse:
+        """Coroutine version of `run_model`.
+
+        The request runs on worker threads dedicated to the coroutine methods,
+        so the event loop is not blocked and several requests can be in flight
+        at once. Raises RuntimeError once the connection is closed.
+        """
+        return await self._run_async(
+            self.run_model, model_id, model_hash, input_tensors, dtypes, shapes
+        )
+
+    async def delete_model_async(self, model_id: str, sync: bool = False):
+        """Coroutine version of `delete_model`.
+
+        The request runs on worker threads dedicated to the coroutine methods,
+        so the event loop is not blocked and several requests can be in flight
+        at once. Raises RuntimeError once the connection is closed.
+        """
+        await self._run_async(self.delete_model, model_id, sync)
+
+    def _delete_worker(self):
+        """Send the deletions queued by `delete_model` in batches.
+
+        Runs until it reads None from the queue, which `close` sends once the
+        pending deletions are queued.
+        """
+        assert self._delete_queue is not None
+        while True:
+            model_ids = [self._delete_queue.get()]
+            while True:
+                try:
+                    model_ids.append(self._delete_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            futures = [
+                (model_id, self._executor.submit(self._delete_model, model_id))
+                for model_id in model_ids
+                if model_id is not None
+            ]
+            for model_id, future in futures:
+                try:
+                    future.result()
+                except Exception:
+                    logger.exception("Failed to delete model %s", model_id)
+
+            if None in model_ids:
+                return
 
     def close(self):
+        if self._delete_queue is not None:
+            with self._delete_lock:
+                if not self._closed:
+                    self._closed = True
+                    self._delete_queue.put(None)
+            self._delete_thread.join()
+        self._executor.shutdown()
+        self._async_executor.shutdown()
         self._conn.close()
 
     def __enter__(self):
@@ -801,6 +1429,9 @@ def connect(
     hazmat_http_on_unattested_port=False,
     simulation_mode: bool = False,
     use_cloud_manifest: bool = False,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    chunk_size: int = CHUNK_SIZE,
+    batch_deletes: bool = False,
 ) -> BlindAiConnection:
     """Connect to a BlindAi server.
 
@@ -824,6 +1455,15 @@ def connect(
             This mode SHOULD NEVER be enabled in production.
             Defaults to False (production mode)
         use_cloud_manifest (bool, optional): If set to True, the manifest for the local model management version (aka the cloud version) will be used.
+        pool_size (int, optional): Maximum number of connections kept open to the attested server,
+            which bounds the number of concurrent requests served without reconnecting. Defaults to 4.
+        chunk_size (int, optional): Size in bytes of the chunks in which models are streamed to the server.
+            Defaults to 1 MiB.
+        batch_deletes (bool, optional): If set to True, `delete_model` returns immediately and the deletions
+            are sent in batches by a background thread. Defaults to False.
+            The queued deletions are only guaranteed to be sent by `close` (or when leaving the
+            connection's `with` block): the background thread is a daemon, so deletions still
+            queued when the program exits without closing the connection are lost.
 
      Raises:
         requests.exceptions.RequestException: If a network or server error occurs
@@ -846,4 +1486,7 @@ def connect(
         hazmat_http_on_unattested_port,
         simulation_mode,
         use_cloud_manifest,
+        pool_size,
+        chunk_size,
+        batch_deletes,
     )
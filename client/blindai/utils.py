@@ -15,7 +15,6 @@
 import re
 import cryptography.x509
 from cryptography.hazmat.primitives import serialization
-import torch
 import os
 
 
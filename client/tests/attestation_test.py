@@ -0,0 +1,174 @@
+from blindai import client, _dcap_attestation
+from blindai.client import BlindAiConnection, AttestationError, _cache_attestation
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from datetime import datetime, timedelta
+import cbor2
+import pytest
+import sys
+import threading
+
+COLLATERAL = {
+    "version": 3,
+    "pck_certificate": "",
+    "pck_crl_issuer_chain": "",
+    "pck_signing_chain": "",
+    "root_ca_crl": "",
+    "pck_crl": "",
+    "tcb_info": "",
+    "tcb_info_issuer_chain": "",
+    "qe_identity": "",
+    "qe_identity_issuer_chain": "",
+}
+
+
+def make_cert(not_valid_before, not_valid_after):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "blindai-srv")])
+    return (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(not_valid_before)
+        .not_valid_after(not_valid_after)
+        .sign(key, hashes.SHA256())
+        .public_bytes(client.serialization.Encoding.DER)
+    )
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = cbor2.dumps(content)
+        self.headers = {"Server": "blindai"}
+
+
+class FakeUnattestedSession:
+    """Stands for the unattested server, serves the attestation evidence."""
+
+    def __init__(self, cert):
+        self.replies = {
+            "": cert,
+            "/quote": b"quote",
+            "/collateral": COLLATERAL,
+        }
+
+    def get(self, url):
+        return FakeResponse(self.replies[url[len("https://localhost:9923") :]])
+
+
+class FakeAttestedSession:
+    def mount(self, prefix, adapter):
+        pass
+
+    def get(self, url):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def validations(monkeypatch):
+    """Record the calls to validate_attestation, which accepts everything."""
+    calls = []
+    monkeypatch.setattr(client, "_ATTESTATION_CACHE", {})
+    monkeypatch.setattr(client.requests, "Session", FakeAttestedSession)
+    monkeypatch.setattr(
+        _dcap_attestation,
+        "validate_attestation",
+        lambda *args, **kwargs: calls.append(args),
+    )
+    return calls
+
+
+def connect(monkeypatch, cert):
+    monkeypatch.setattr(
+        client, "_unattested_session", lambda url: FakeUnattestedSession(cert)
+    )
+    with BlindAiConnection(
+        "localhost", 9923, 9924, 9924, None, False, False, False
+    ) as conn:
+        return conn
+
+
+def testAttestationCacheHit(monkeypatch, validations):
+    now = datetime.utcnow()
+    cert = make_cert(now - timedelta(days=1), now + timedelta(days=1))
+
+    connect(monkeypatch, cert)
+    connect(monkeypatch, cert)
+
+    assert len(validations) == 1
+
+
+def testAttestationCacheExpiry(monkeypatch, validations):
+    now = datetime.utcnow()
+    cert = make_cert(now - timedelta(days=1), now + timedelta(days=1))
+
+    connect(monkeypatch, cert)
+    monkeypatch.setattr(client, "ATTESTATION_CACHE_TTL", -1)
+    (key,) = client._ATTESTATION_CACHE
+    _cache_attestation(key)
+    connect(monkeypatch, cert)
+
+    assert len(validations) == 2
+
+
+def testAttestationCacheEvictsExpiredEntries(monkeypatch):
+    monkeypatch.setattr(client, "_ATTESTATION_CACHE", {})
+    monkeypatch.setattr(client, "ATTESTATION_CACHE_TTL", -1)
+    _cache_attestation(b"expired")
+    monkeypatch.setattr(client, "ATTESTATION_CACHE_TTL", 300)
+    _cache_attestation(b"fresh")
+
+    assert list(client._ATTESTATION_CACHE) == [b"fresh"]
+
+
+def testAttestationCacheConcurrentInserts(monkeypatch):
+    monkeypatch.setattr(client, "_ATTESTATION_CACHE", {})
+    errors = []
+
+    def insert(thread):
+        try:
+            for i in range(1000):
+                _cache_attestation(bytes([thread]) + i.to_bytes(2, "little"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=insert, args=(i,)) for i in range(8)]
+    # Switch threads often, so that inserts happen while another thread
+    # walks the cache looking for expired entries.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    assert len(client._ATTESTATION_CACHE) == 8000
+
+
+def testAttestationCacheChecksCertValidity(monkeypatch, validations):
+    now = datetime.utcnow()
+    cert = make_cert(now - timedelta(days=2), now - timedelta(days=1))
+
+    with pytest.raises(AttestationError, match="expired"):
+        connect(monkeypatch, cert)
+    # The attestation itself is cached, but the certificate is checked on
+    # every connection.
+    with pytest.raises(AttestationError, match="expired"):
+        connect(monkeypatch, cert)
+    assert len(validations) == 1
+
+
+def testMalformedCertificate(monkeypatch, validations):
+    with pytest.raises(AttestationError, match="Attestation verification failed"):
+        connect(monkeypatch, b"not a certificate")
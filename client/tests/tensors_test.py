@@ -109,3 +109,28 @@ def testTensorSerialization():
             "bytes_data": expected_bytes,
         },
     ]
+
+
+def testNonContiguousTensorSerialization():
+    array = numpy.arange(6, dtype=numpy.int32).reshape(2, 3).T
+    o = translate_tensors(array, None, None)
+    assert o[0]["bytes_data"] == array.flatten().tobytes()
+    assert o[0]["info"]["fact"] == (3, 2)
+
+    o = translate_tensors(
+        torch.tensor(array.T.tolist(), dtype=torch.int32).T, None, None
+    )
+    assert o[0]["bytes_data"] == array.flatten().tobytes()
+
+
+def testTensorNumpyConversionIsCached():
+    data = numpy.arange(6, dtype=numpy.float32).tobytes()
+    tensor = Tensor(TensorInfo((2, 3), ModelDatumType.F32, "output"), data)
+    arr = tensor.as_numpy()
+    assert arr.shape == (2, 3)
+    assert not arr.flags.writeable
+    assert numpy.shares_memory(tensor.as_numpy(), arr)
+    # Each call returns its own view, reshaping one leaves the others alone.
+    arr.shape = (6,)
+    assert tensor.as_numpy().shape == (2, 3)
+    assert tensor.as_flat() == [[0, 1, 2], [3, 4, 5]]
@@ -0,0 +1,308 @@
+from blindai import client
+from blindai.client import (
+    BlindAiConnection,
+    _cbor_head,
+    _cache_model_hash,
+    _prefetch,
+    _read_chunks,
+    _PreEncoded,
+    _CBOR_BYTES,
+    _CBOR_MAP,
+)
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from hashlib import sha256
+import io
+import numpy as np
+import queue
+import cbor2
+import pytest
+import requests
+import sys
+import threading
+
+
+class FakeSession:
+    """Stands for the attested session, replies like the server would."""
+
+    def __init__(self, reply_hash=None, failing=()):
+        self.reply_hash = reply_hash
+        self.failing = failing
+        self.uploads = []
+        self.deletions = []
+
+    def post(self, url, data):
+        if url.endswith("/delete"):
+            model_id = cbor2.loads(data)["model_id"]
+            self.deletions.append(model_id)
+            return FakeResponse(b"", failed=model_id in self.failing)
+        if url.endswith("/run"):
+            # Echo the inputs back as outputs.
+            body = cbor2.loads(b"".join(bytes(chunk) for chunk in data))
+            return FakeResponse(
+                cbor2.dumps({"outputs": body["inputs"]}),
+                failed=body["model_id"] in self.failing,
+            )
+        body = cbor2.loads(b"".join(bytes(chunk) for chunk in data))
+        self.uploads.append(body["model"])
+        reply_hash = self.reply_hash or sha256(body["model"]).digest()
+        return FakeResponse(cbor2.dumps({"hash": reply_hash, "model_id": "id"}))
+
+    def close(self):
+        pass
+
+
+class FakeResponse:
+    def __init__(self, content, failed=False):
+        self.content = content
+        self.failed = failed
+
+    def raise_for_status(self):
+        if self.failed:
+            raise requests.HTTPError("500 Server Error")
+
+
+def make_connection(session, batch_deletes=False):
+    """Build a connection over session, skipping the attestation."""
+    conn = BlindAiConnection.__new__(BlindAiConnection)
+    conn._conn = session
+    conn._attested_url = "https://localhost:9924"
+    conn._model_management_url = "https://localhost:9924"
+    conn._chunk_size = 4
+    conn._client_info_cbor = _PreEncoded(cbor2.dumps({}))
+    conn._executor = ThreadPoolExecutor(max_workers=4)
+    conn._async_executor = ThreadPoolExecutor(max_workers=4)
+    conn._delete_queue = None
+    conn._delete_lock = threading.Lock()
+    conn._closed = False
+    if batch_deletes:
+        conn._delete_queue = queue.Queue()
+        conn._delete_thread = threading.Thread(target=conn._delete_worker, daemon=True)
+        conn._delete_thread.start()
+    return conn
+
+
+@pytest.fixture(autouse=True)
+def empty_model_hash_cache(monkeypatch):
+    monkeypatch.setattr(client, "_MODEL_HASH_CACHE", {})
+
+
+def testCborHead():
+    for length in [0, 1, 23, 24, 255, 256, 65535, 65536]:
+        data = bytes(length)
+        assert _cbor_head(_CBOR_BYTES, length) + data == cbor2.dumps(data)
+
+    fields = {"length": 4, "model_name": "model.onnx"}
+    encoded = _cbor_head(_CBOR_MAP, len(fields)) + b"".join(
+        cbor2.dumps(k) + cbor2.dumps(v) for k, v in fields.items()
+    )
+    assert encoded == cbor2.dumps(fields)
+
+
+def testPrefetch():
+    chunks = [bytes([i]) * 3 for i in range(5)]
+    assert list(_prefetch(iter(chunks))) == chunks
+    assert list(_prefetch(iter(chunks), depth=10)) == chunks
+    assert list(_prefetch(iter([]))) == []
+
+
+def testModelHashCacheMiss(tmp_path):
+    model = tmp_path / "model.onnx"
+    model.write_bytes(b"some model bytes")
+    session = FakeSession()
+
+    response = make_connection(session).upload_model(str(model))
+
+    assert session.uploads == [b"some model bytes"]
+    assert response.hash == sha256(b"some model bytes").digest()
+    assert list(client._MODEL_HASH_CACHE.values()) == [response.hash]
+
+
+def testModelHashCacheHit(tmp_path):
+    model = tmp_path / "model.onnx"
+    model.write_bytes(b"some model bytes")
+    conn = make_connection(FakeSession())
+    conn.upload_model(str(model))
+    (key,) = client._MODEL_HASH_CACHE
+
+    # The upload succeeds only if the cached digest is used instead of
+    # hashing the file again.
+    client._MODEL_HASH_CACHE[key] = b"cached digest"
+    conn._conn = FakeSession(reply_hash=b"cached digest")
+    conn.upload_model(str(model))
+
+    assert client._MODEL_HASH_CACHE[key] == b"cached digest"
+
+
+def testModelHashCacheStaleEntry(tmp_path):
+    model = tmp_path / "model.onnx"
+    model.write_bytes(b"some model bytes")
+    conn = make_connection(FakeSession())
+    conn.upload_model(str(model))
+    (key,) = client._MODEL_HASH_CACHE
+
+    client._MODEL_HASH_CACHE[key] = b"stale digest"
+    response = conn.upload_model(str(model))
+
+    assert response.hash == sha256(b"some model bytes").digest()
+    assert client._MODEL_HASH_CACHE[key] == response.hash
+
+
+def testUploadHashMismatch(tmp_path):
+    model = tmp_path / "model.onnx"
+    model.write_bytes(b"some model bytes")
+    session = FakeSession(reply_hash=b"another digest")
+
+    with pytest.raises(ValueError, match="model id: id"):
+        make_connection(session).upload_model(str(model))
+
+    assert session.deletions == ["id"]
+    assert client._MODEL_HASH_CACHE == {}
+
+
+def testModelHashCacheEviction(monkeypatch):
+    monkeypatch.setattr(client, "_MODEL_HASH_CACHE_SIZE", 2)
+    for i in range(3):
+        _cache_model_hash(("model.onnx", 0, i, 0, 0), bytes([i]))
+    _cache_model_hash(("model.onnx", 0, 2, 0, 0), b"updated")
+
+    assert client._MODEL_HASH_CACHE == {
+        ("model.onnx", 0, 1, 0, 0): bytes([1]),
+        ("model.onnx", 0, 2, 0, 0): b"updated",
+    }
+
+
+def testModelHashCacheConcurrentInserts(monkeypatch):
+    monkeypatch.setattr(client, "_MODEL_HASH_CACHE_SIZE", 8)
+    errors = []
+
+    def insert(thread):
+        try:
+            for i in range(1000):
+                _cache_model_hash(("model.onnx", thread, i, 0, 0), b"digest")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=insert, args=(i,)) for i in range(8)]
+    # Switch threads often, so that inserts interleave with the evictions.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    assert len(client._MODEL_HASH_CACHE) == 8
+
+
+def testReadChunks():
+    f = io.BytesIO(bytes(range(10)))
+    chunks = [bytes(chunk) for chunk in _read_chunks(f, 10, 4, 3)]
+
+    assert chunks == [bytes(range(4)), bytes(range(4, 8)), bytes(range(8, 10))]
+
+
+def testReadChunksRotatesBuffers():
+    f = io.BytesIO(bytes(range(12)))
+    chunks = list(_read_chunks(f, 12, 4, 2))
+
+    # The third chunk was read into the buffer of the first one.
+    assert chunks[0].obj is chunks[2].obj
+    assert bytes(chunks[0]) == bytes(range(8, 12))
+
+
+@pytest.mark.parametrize("content", [b"short", b"a bit too long"])
+def testReadChunksLengthMismatch(content):
+    with pytest.raises(ValueError):
+        list(_read_chunks(io.BytesIO(content), 10, 4, 3))
+
+
+def testBatchDeletes():
+    session = FakeSession()
+    conn = make_connection(session, batch_deletes=True)
+    for model_id in ["a", "b", "c"]:
+        conn.delete_model(model_id)
+    conn.close()
+
+    # close() waits for the queued deletions to be sent.
+    assert sorted(session.deletions) == ["a", "b", "c"]
+    with pytest.raises(RuntimeError):
+        conn.delete_model("d")
+    # Deletions that are not queued are still sent.
+    conn.delete_model("e", sync=True)
+    assert session.deletions[-1] == "e"
+
+
+def testBatchDeletesFailure(caplog):
+    session = FakeSession(failing={"b"})
+    conn = make_connection(session, batch_deletes=True)
+    for model_id in ["a", "b", "c"]:
+        conn.delete_model(model_id)
+    conn.close()
+
+    assert sorted(session.deletions) == ["a", "b", "c"]
+    failures = [r.getMessage() for r in caplog.records]
+    assert failures == ["Failed to delete model b"]
+
+
+def testRunModelBatchKeepsInputOrder():
+    conn = make_connection(FakeSession())
+    inputs = [np.array([i], dtype=np.float32) for i in range(8)]
+
+    responses = conn.run_model_batch(model_id="m", inputs=inputs)
+
+    assert [r.output[0].as_flat() for r in responses] == [[i] for i in range(8)]
+
+
+def testRunModelBatchFailure():
+    conn = make_connection(FakeSession(failing={"m"}))
+    with pytest.raises(requests.HTTPError):
+        conn.run_model_batch(model_id="m", inputs=[np.array([1.0])])
+
+
+def testDeleteModels():
+    session = FakeSession(failing={"b"})
+    conn = make_connection(session)
+    conn.delete_models(["a", "c"])
+    assert sorted(session.deletions) == ["a", "c"]
+
+    with pytest.raises(requests.HTTPError):
+        conn.delete_models(["b"])
+
+
+def testAsyncMethods(tmp_path):
+    model = tmp_path / "model.onnx"
+    model.write_bytes(b"some model bytes")
+    session = FakeSession()
+    conn = make_connection(session)
+
+    async def main():
+        upload = await conn.upload_model_async(str(model))
+        responses = await asyncio.gather(
+            *(
+                conn.run_model_async(
+                    model_id=upload.model_id,
+                    input_tensors=np.array([i], dtype=np.float32),
+                )
+                for i in range(4)
+            )
+        )
+        await conn.delete_model_async(upload.model_id)
+        return responses
+
+    responses = asyncio.run(main())
+
+    assert [r.output[0].as_flat() for r in responses] == [[i] for i in range(4)]
+    assert session.deletions == ["id"]
+
+
+def testAsyncMethodsAfterClose():
+    conn = make_connection(FakeSession())
+    conn.close()
+
+    with pytest.raises(RuntimeError, match="The connection is closed"):
+        asyncio.run(conn.delete_model_async("id"))